@@ -1,6 +1,14 @@
 # part 1:  How many measurements are larger than the previous measurement?
 # Part 2: Consider sums of a three-measurement sliding window. How many sums are
 # larger than the previous sum?
+import os
+import pathlib
+from collections import deque
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+from typing import Optional
+
 import pytest
 
 
@@ -14,34 +22,169 @@ def depthIncreaseDetector(depthData: list[int]) -> int:
     return counter
 
 
+def checkWindowSize(windowSize: int) -> None:
+    if windowSize < 1:
+        raise ValueError(f"Window size must be at least 1: {windowSize}")
+
+
+def windowComparator(depthData: Iterable[int], windowSize: int = 3) -> int:
+    # Neighbouring windows share all but one reading, so a window sum only
+    # grows when the new depth beats the one leaving windowSize readings back.
+    checkWindowSize(windowSize)
+    counter: int = 0
+    window: deque[int] = deque(maxlen=windowSize)
+
+    for depth in depthData:
+        if len(window) == windowSize and depth > window[0]:
+            counter += 1
+
+        window.append(depth)
+
+    return counter
+
+
 def slidingScaleComparator(depthData: list[int]) -> int:
+    return windowComparator(depthData, 3)
+
+
+def streamingDepthScan(
+    depthStream: Iterable[int], windowSize: int = 3
+) -> tuple[int, int]:
+    # Single pass over the stream, only the last windowSize depths are kept
+    checkWindowSize(windowSize)
     counter: int = 0
-    prevVal: int = 0
+    windowCounter: int = 0
+    window: deque[int] = deque(maxlen=windowSize)
 
-    for itera, item in enumerate(depthData):
-        try:
-            val = depthData[itera] + depthData[itera + 1] + depthData[itera + 2]
-        except IndexError:
-            break
+    for depth in depthStream:
+        if window and depth > window[-1]:
+            counter += 1
+        if len(window) == windowSize and depth > window[0]:
+            windowCounter += 1
+
+        window.append(depth)
+
+    return counter, windowCounter
+
+
+def numpyDepthScan(depthData: Any, windowSize: int = 3) -> tuple[int, int]:
+    checkWindowSize(windowSize)
+
+    # Imported lazily so numpy stays optional
+    import numpy as np
+
+    depths = np.asarray(depthData, dtype=np.int64)
+
+    counter = int(np.count_nonzero(depths[1:] > depths[:-1]))
+    windowCounter = int(np.count_nonzero(depths[windowSize:] > depths[:-windowSize]))
+
+    return counter, windowCounter
+
+
+def chunkBoundaries(filename: str, chunkCount: int) -> list[tuple[int, int]]:
+    # Byte ranges of roughly equal size, each nudged forward to a line start
+    fileSize = os.path.getsize(filename)
+    offsets = [0]
+
+    with open(filename, "rb") as inputData:
+        for chunk in range(1, chunkCount):
+            inputData.seek(fileSize * chunk // chunkCount)
+            inputData.readline()
+            offsets.append(max(inputData.tell(), offsets[-1]))
+
+    offsets.append(fileSize)
+
+    return [(a, b) for a, b in zip(offsets, offsets[1:]) if a < b]
 
-        if val > prevVal and not prevVal == 0:
+
+def scanChunk(
+    filename: str, start: int, end: int, windowSize: int
+) -> tuple[int, int, list[int], list[int]]:
+    # Counts increases inside the chunk and hands back its first and last
+    # windowSize depths so the caller can stitch the chunk edges together
+    counter: int = 0
+    windowCounter: int = 0
+    head: list[int] = []
+    window: deque[int] = deque(maxlen=windowSize)
+    position = start
+
+    with open(filename, "rb") as inputData:
+        inputData.seek(start)
+
+        while position < end:
+            line = inputData.readline()
+            if not line:
+                break
+            position += len(line)
+            if not line.strip():
+                continue
+
+            depth = int(line)
+            if window and depth > window[-1]:
+                counter += 1
+            if len(window) == windowSize and depth > window[0]:
+                windowCounter += 1
+
+            if len(head) < windowSize:
+                head.append(depth)
+            window.append(depth)
+
+    return counter, windowCounter, head, list(window)
+
+
+def parallelDepthScan(
+    filename: str, windowSize: int = 3, workers: Optional[int] = None
+) -> tuple[int, int]:
+    checkWindowSize(windowSize)
+    workers = workers or os.cpu_count() or 1
+    chunks = chunkBoundaries(filename, workers)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(
+            pool.map(
+                scanChunk,
+                [filename] * len(chunks),
+                [start for start, _ in chunks],
+                [end for _, end in chunks],
+                [windowSize] * len(chunks),
+            )
+        )
+
+    counter: int = 0
+    windowCounter: int = 0
+    # The last windowSize depths seen before the current chunk
+    carry: deque[int] = deque(maxlen=windowSize)
+
+    for chunkCounter, chunkWindowCounter, head, tail in results:
+        counter += chunkCounter
+        windowCounter += chunkWindowCounter
+
+        # Only the first windowSize depths of a chunk look back across its edge
+        if head and carry and head[0] > carry[-1]:
             counter += 1
+        for idx, depth in enumerate(head):
+            back = len(carry) + idx - windowSize
+            if 0 <= back < len(carry) and depth > carry[back]:
+                windowCounter += 1
 
-        prevVal = val
+        carry.extend(tail)
 
-    return counter
+    return counter, windowCounter
 
 
-def main(filename: str) -> int:
-    with open(filename) as inputData:
-        rawData = inputData.readlines()
+def main(filename: str, useNumpy: bool = False, workers: int = 1) -> int:
+    if workers > 1:
+        depthCounter, scaledDepthCounter = parallelDepthScan(filename, 3, workers)
+    elif useNumpy:
+        import numpy as np
 
-    depthData = list(map(int, rawData))
+        depthArray = np.fromfile(filename, dtype=np.int64, sep=" ")
+        depthCounter, scaledDepthCounter = numpyDepthScan(depthArray)
+    else:
+        with open(filename) as inputData:
+            depthCounter, scaledDepthCounter = streamingDepthScan(map(int, inputData))
 
-    depthCounter = depthIncreaseDetector(depthData)
     print(f"Part 1: {depthCounter}")
-
-    scaledDepthCounter = slidingScaleComparator(depthData)
     print(f"Part 2: {scaledDepthCounter}")
     return 0
 
@@ -64,3 +207,67 @@ def test_depthIncreaseDetector(input_data: list[int], expected: int) -> None:
 @pytest.mark.parametrize(("input_data", "expected"), ((test_data, 5),))
 def test_slidingScaleComparator(input_data: list[int], expected: int) -> None:
     assert slidingScaleComparator(input_data) == expected
+
+
+@pytest.mark.parametrize(("input_data", "expected"), ((test_data, (7, 5)),))
+def test_streamingDepthScan(input_data: list[int], expected: tuple[int, int]) -> None:
+    assert streamingDepthScan(iter(input_data)) == expected
+
+
+@pytest.mark.parametrize(
+    ("input_data", "window_size", "expected"),
+    (
+        (test_data, 1, 7),
+        (test_data, 3, 5),
+        (test_data, 5, 5),
+        (test_data, 10, 0),
+    ),
+)
+def test_windowComparator(
+    input_data: list[int], window_size: int, expected: int
+) -> None:
+    assert windowComparator(input_data, window_size) == expected
+
+
+@pytest.mark.parametrize(
+    ("input_data", "window_size", "expected"),
+    (
+        (test_data, 3, (7, 5)),
+        (test_data, 5, (7, 5)),
+    ),
+)
+def test_numpyDepthScan(
+    input_data: list[int], window_size: int, expected: tuple[int, int]
+) -> None:
+    pytest.importorskip("numpy")
+    assert numpyDepthScan(input_data, window_size) == expected
+
+
+@pytest.mark.parametrize(
+    ("input_data", "window_size", "workers"),
+    (
+        (test_data, 1, 4),
+        (test_data, 3, 3),
+        (test_data, 3, 16),
+        (test_data * 50, 5, 7),
+    ),
+)
+def test_parallelDepthScan(
+    tmp_path: pathlib.Path, input_data: list[int], window_size: int, workers: int
+) -> None:
+    depth_file = tmp_path / "depths.txt"
+    depth_file.write_text("\n".join(map(str, input_data)) + "\n")
+
+    assert parallelDepthScan(
+        str(depth_file), window_size, workers
+    ) == streamingDepthScan(input_data, window_size)
+
+
+@pytest.mark.parametrize("window_size", (0, -1))
+def test_window_size_validation(window_size: int) -> None:
+    with pytest.raises(ValueError):
+        windowComparator(test_data, window_size)
+    with pytest.raises(ValueError):
+        streamingDepthScan(test_data, window_size)
+    with pytest.raises(ValueError):
+        numpyDepthScan(test_data, window_size)
@@ -1,50 +1,169 @@
 # What to do
+from __future__ import annotations
+
+import itertools
+import os
+from array import array
+from collections.abc import Generator
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+from typing import Optional
+
 import pytest
 
 
-def calcPosition(posData: list[str]) -> int:
-    horizontal_pos: int = 0
-    vertical_pos: int = 0
+FORWARD = 0
+UP = 1
+DOWN = 2
+OPCODES = {"forward": FORWARD, "up": UP, "down": DOWN}
+
+
+def compileCommands(posData: Iterable[str]) -> tuple[array[int], array[int]]:
+    # Parse the log once into parallel opcode/magnitude buffers
+    opcodes: array[int] = array("b")
+    magnitudes: array[int] = array("i")
 
     for item in posData:
-        moveData = item.split(" ")
-        if moveData[0] == "forward":
-            horizontal_pos += int(moveData[1])
-        elif moveData[0] == "up":
-            vertical_pos -= int(moveData[1])
-        elif moveData[0] == "down":
-            vertical_pos += int(moveData[1])
+        moveData = item.split()
+        if not moveData:
+            continue
+        if len(moveData) != 2 or moveData[0] not in OPCODES:
+            raise ValueError(f"Malformed command: {item!r}")
 
-    return horizontal_pos * vertical_pos
+        opcodes.append(OPCODES[moveData[0]])
+        magnitudes.append(int(moveData[1]))
 
+    return opcodes, magnitudes
 
-def updatedPosTracker(posData: list[str]) -> int:
+
+def compiledPosition(opcodes: array[int], magnitudes: array[int]) -> int:
     horizontal_pos: int = 0
     vertical_pos: int = 0
+
+    for op, value in zip(opcodes, magnitudes):
+        if op == FORWARD:
+            horizontal_pos += value
+        elif op == UP:
+            vertical_pos -= value
+        else:
+            vertical_pos += value
+
+    return horizontal_pos * vertical_pos
+
+
+def reduceCommands(opcodes: array[int], magnitudes: array[int]) -> tuple[int, int, int]:
+    # A run of commands acts on (h, d, aim) as
+    #   h += H, aim += A, d += D + aim * H
+    # so (H, D, A) describes the whole run for any starting state
+    horizontal: int = 0
+    depth: int = 0
     aim: int = 0
 
-    for item in posData:
-        moveData = item.split(" ")
-        if moveData[0] == "up":
-            aim -= int(moveData[1])
-        elif moveData[0] == "down":
-            aim += int(moveData[1])
-        elif moveData[0] == "forward":
-            horizontal_pos += int(moveData[1])
-            vertical_pos += aim * int(moveData[1])
+    for op, value in zip(opcodes, magnitudes):
+        if op == UP:
+            aim -= value
+        elif op == DOWN:
+            aim += value
+        else:
+            horizontal += value
+            depth += aim * value
+
+    return horizontal, depth, aim
+
+
+def composeTransforms(
+    first: tuple[int, int, int], second: tuple[int, int, int]
+) -> tuple[int, int, int]:
+    h1, d1, a1 = first
+    h2, d2, a2 = second
+
+    return h1 + h2, d1 + d2 + a1 * h2, a1 + a2
+
+
+def parallelAimTracker(
+    opcodes: array[int], magnitudes: array[int], workers: Optional[int] = None
+) -> int:
+    workers = workers or os.cpu_count() or 1
+    step = -(-len(opcodes) // workers) or 1
+    bounds = range(0, len(opcodes), step)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        partials = pool.map(
+            reduceCommands,
+            [opcodes[i : i + step] for i in bounds],
+            [magnitudes[i : i + step] for i in bounds],
+        )
+        horizontal, depth, _ = reduce(composeTransforms, partials, (0, 0, 0))
+
+    return horizontal * depth
+
+
+def compiledAimTracker(opcodes: array[int], magnitudes: array[int]) -> int:
+    horizontal_pos, vertical_pos, _ = reduceCommands(opcodes, magnitudes)
 
     return horizontal_pos * vertical_pos
 
 
-def main(filename: str) -> int:
+class PositionTracker:
+    # Running (H, D, A) summary of every command fed in so far. Starting from
+    # the origin that is also the (horizontal, depth, aim) state, so it can be
+    # read at any time without replaying the log.
+    summary: tuple[int, int, int]
+
+    def __init__(self) -> None:
+        self.summary = (0, 0, 0)
+
+    def update(self, posData: Iterable[str]) -> None:
+        self.summary = composeTransforms(
+            self.summary, reduceCommands(*compileCommands(posData))
+        )
+
+    def position(self) -> tuple[int, int, int]:
+        return self.summary
+
+
+def trackPositions(
+    posData: Iterable[str], every: int = 1, tracker: Optional[PositionTracker] = None
+) -> Generator[tuple[int, int, int], None, None]:
+    # Lazily reads commands in batches of `every` lines and yields the state
+    # after each batch. Pass in a tracker to read the state on demand while
+    # the generator waits for more input.
+    if every < 1:
+        raise ValueError(f"every must be at least 1: {every}")
+
+    state = tracker or PositionTracker()
+    lines = iter(posData)
+
+    def positions() -> Generator[tuple[int, int, int], None, None]:
+        while batch := list(itertools.islice(lines, every)):
+            state.update(batch)
+            yield state.position()
+
+    return positions()
+
+
+def calcPosition(posData: list[str]) -> int:
+    return compiledPosition(*compileCommands(posData))
+
+
+def updatedPosTracker(posData: list[str]) -> int:
+    return compiledAimTracker(*compileCommands(posData))
+
+
+def main(filename: str, workers: int = 1) -> int:
     with open(filename) as inputData:
         rawData = inputData.readlines()
 
-    # data = list(map(int, rawData))
-    current_pos = calcPosition(rawData)
+    opcodes, magnitudes = compileCommands(rawData)
+
+    current_pos = compiledPosition(opcodes, magnitudes)
     print(f"Part 1: {current_pos}")
 
-    updatedPos = updatedPosTracker(rawData)
+    if workers > 1:
+        updatedPos = parallelAimTracker(opcodes, magnitudes, workers)
+    else:
+        updatedPos = compiledAimTracker(opcodes, magnitudes)
     print(f"Part 2: {updatedPos}")
 
     return 0
@@ -67,3 +186,63 @@ def test_calcPosition(input_data: list[str], expected: int) -> None:
 @pytest.mark.parametrize(("input_data", "expected"), ((test_data, 900),))
 def test_updatedPosTracker(input_data: list[str], expected: int) -> None:
     assert updatedPosTracker(input_data) == expected
+
+
+def test_compileCommands() -> None:
+    opcodes, magnitudes = compileCommands(test_data)
+    assert list(opcodes) == [FORWARD, DOWN, FORWARD, UP, DOWN, FORWARD]
+    assert list(magnitudes) == [5, 5, 8, 3, 8, 2]
+
+
+@pytest.mark.parametrize("line", ("forwrd 3", "down", "down 2 3", "up x"))
+def test_compileCommands_malformed(line: str) -> None:
+    with pytest.raises(ValueError):
+        compileCommands(["forward 1", line])
+
+
+@pytest.mark.parametrize(
+    ("input_data", "workers"),
+    (
+        (test_data, 1),
+        (test_data, 4),
+        (test_data * 25, 7),
+        ([], 2),
+    ),
+)
+def test_parallelAimTracker(input_data: list[str], workers: int) -> None:
+    opcodes, magnitudes = compileCommands(input_data)
+    assert parallelAimTracker(opcodes, magnitudes, workers) == compiledAimTracker(
+        opcodes, magnitudes
+    )
+
+
+@pytest.mark.parametrize(
+    ("input_data", "every", "expected"),
+    (
+        (test_data, 2, [(5, 0, 5), (13, 40, 2), (15, 60, 10)]),
+        (test_data, 4, [(13, 40, 2), (15, 60, 10)]),
+        (test_data, 6, [(15, 60, 10)]),
+    ),
+)
+def test_trackPositions(
+    input_data: list[str], every: int, expected: list[tuple[int, int, int]]
+) -> None:
+    assert list(trackPositions(iter(input_data), every)) == expected
+
+
+@pytest.mark.parametrize("every", (0, -1))
+def test_trackPositions_every(every: int) -> None:
+    with pytest.raises(ValueError):
+        trackPositions(iter(test_data), every)
+
+
+def test_trackPositions_on_demand() -> None:
+    tracker = PositionTracker()
+    positions = trackPositions(iter(test_data), 4, tracker)
+    assert tracker.position() == (0, 0, 0)
+
+    assert next(positions) == (13, 40, 2)
+    assert tracker.position() == (13, 40, 2)
+
+    tracker.update(["forward 1"])
+    assert tracker.position() == (14, 42, 2)
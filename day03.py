@@ -4,90 +4,184 @@
 # Part 2: Use the binary numbers in your diagnostic report to calculate the
 # oxygen generator rating and CO2 scrubber rating, then multiply them together.
 # What is the life support rating of the submarine?
+import pathlib
+from collections.abc import Iterable
+from typing import Any
+
 import pytest
 
 
-def binaryCount(rawData: list[str]) -> list[int]:
-    counter = [0] * (len(rawData[0]))
+def parseDiagnostics(rawData: list[str]) -> tuple[list[int], int]:
+    return [int(item, 2) for item in rawData], len(rawData[0])
 
-    for item in rawData:
-        charItem = list(item)
 
-        for i, char in enumerate(charItem):
-            if char == "1":
-                counter[i] += 1
+def numpyBitCounts(values: Any, bitLength: int) -> list[int]:
+    import numpy as np
 
-    return counter
+    shifts = np.arange(bitLength - 1, -1, -1, dtype=np.uint64)
+    bits = (np.asarray(values, dtype=np.uint64)[:, None] >> shifts) & np.uint64(1)
 
+    return [int(count) for count in bits.sum(axis=0)]
 
-def lifeSupportRating(rawData: list[str], flip: bool = False) -> int:
-    gasValue: int = 0
 
-    bitLength = len(rawData[0])
+def loadDiagnosticArray(filename: str) -> tuple[Any, int]:
+    # Reads fixed-width rows straight into a uint64 array without per-line
+    # parsing, every row has to be the same width
+    import numpy as np
+
+    with open(filename, "rb") as inputData:
+        raw = inputData.read().rstrip(b"\n") + b"\n"
+
+    bitLength = raw.index(b"\n")
+    rows = np.frombuffer(raw, dtype=np.uint8).reshape(-1, bitLength + 1)
+    bits = (rows[:, :bitLength] == ord("1")).astype(np.uint64)
+    weights = np.uint64(1) << np.arange(bitLength - 1, -1, -1, dtype=np.uint64)
+
+    return bits @ weights, bitLength
 
-    for index in range(bitLength):
 
-        # List of sets for each bit
-        pivotData = list(zip(*rawData))
+def gammaEpsilon(counter: list[int], rowCount: int) -> tuple[int, int]:
+    gamma: int = 0
 
-        if len(rawData) < 3:
-            if flip:
-                if len(rawData) != 1:
-                    rawData = [i for i in rawData if i[-1] == "0"]
+    for val in counter:
+        gamma = (gamma << 1) | (val * 2 >= rowCount)
+
+    epsilon = ~gamma & ((1 << len(counter)) - 1)
+
+    return gamma, epsilon
+
+
+def binaryCount(rawData: list[str]) -> list[int]:
+    return [column.count("1") for column in zip(*rawData)]
+
+
+class DiagnosticTrie:
+    # Binary trie over the report rows, most significant bit first. Nodes
+    # live in flat lists, index 0 is the root and doubles as "no child".
+    bitLength: int
+    children: list[list[int]]
+    counts: list[int]
+
+    def __init__(self, values: Iterable[int], bitLength: int):
+        self.bitLength = bitLength
+        self.children = [[0, 0]]
+        self.counts = [0]
+
+        for value in values:
+            self.insert(value)
+
+    def insert(self, value: int) -> None:
+        node = 0
+        self.counts[0] += 1
+
+        for shift in range(self.bitLength - 1, -1, -1):
+            bit = (value >> shift) & 1
+            child = self.children[node][bit]
+
+            if not child:
+                child = len(self.counts)
+                self.children.append([0, 0])
+                self.counts.append(0)
+                self.children[node][bit] = child
+
+            self.counts[child] += 1
+            node = child
+
+    def rating(self, flip: bool = False) -> int:
+        # Oxygen keeps the most common bit (ties go to 1), carbon keeps the
+        # least common one (ties go to 0). An empty branch is never taken.
+        node = 0
+        value = 0
+
+        for _ in range(self.bitLength):
+            zero, one = self.children[node]
+            zeros = self.counts[zero] if zero else 0
+            ones = self.counts[one] if one else 0
+
+            if not flip:
+                bit = 1 if ones >= zeros else 0
+            elif zeros and ones:
+                bit = 0 if zeros <= ones else 1
             else:
-                rawData = [i for i in rawData if i[-1] == "1"]
+                bit = 0 if zeros else 1
 
-            gasValue = int(rawData[0], 2)
-            break
+            value = (value << 1) | bit
+            node = self.children[node][bit]
 
-        if not flip:
-            # Oxygen
-            cb = max(pivotData[index], key=pivotData[index].count)
-        else:
-            # Carbon
-            cb = (
-                "0"
-                if pivotData[index].count("0") <= pivotData[index].count("1")
-                else "1"
-            )
+        return value
 
-        rawData = [item for item in rawData if item[index] == cb]
 
-    return gasValue
+class DiagnosticReport:
+    # Append-only report that keeps per-bit counters and the life support
+    # trie current, so either answer can be asked for at any time
+    bitLength: int
+    rowCount: int
+    counter: list[int]
+    trie: DiagnosticTrie
 
+    def __init__(self, bitLength: int, rawData: Iterable[str] = ()):
+        self.bitLength = bitLength
+        self.rowCount = 0
+        self.counter = [0] * bitLength
+        self.trie = DiagnosticTrie((), bitLength)
 
-def getGammaEpsilonCount(rawData: list[str]) -> int:
-    gamma: str = ""
-    epsilon: str = ""
+        self.extend(rawData)
 
-    counter = binaryCount(rawData)
+    def add(self, line: str) -> None:
+        if len(line.strip()) != self.bitLength:
+            raise ValueError(f"Expected {self.bitLength} bits: {line!r}")
 
-    for val in counter:
-        if val >= (len(rawData) / 2):
-            gamma += "1"
-            epsilon += "0"
-        else:
-            gamma += "0"
-            epsilon += "1"
+        value = int(line, 2)
+
+        for i in range(self.bitLength):
+            self.counter[i] += (value >> (self.bitLength - 1 - i)) & 1
+
+        self.rowCount += 1
+        self.trie.insert(value)
+
+    def extend(self, rawData: Iterable[str]) -> None:
+        for line in rawData:
+            if line.strip():
+                self.add(line)
+
+    def powerConsumption(self) -> int:
+        gamma, epsilon = gammaEpsilon(self.counter, self.rowCount)
 
-    gamma_int = int(gamma, 2)
-    epsilon_int = int(epsilon, 2)
+        return gamma * epsilon
 
-    return gamma_int * epsilon_int
+    def lifeSupport(self) -> int:
+        return self.trie.rating() * self.trie.rating(True)
 
 
-def main(filename: str) -> int:
-    with open(filename) as inputData:
-        rawData = inputData.readlines()
+def lifeSupportRating(rawData: list[str], flip: bool = False) -> int:
+    return DiagnosticTrie(*parseDiagnostics(rawData)).rating(flip)
+
+
+def getGammaEpsilonCount(rawData: list[str]) -> int:
+    gamma, epsilon = gammaEpsilon(binaryCount(rawData), len(rawData))
+
+    return gamma * epsilon
 
-    rawData = [line.rstrip("\n") for line in rawData]
 
-    totalRates = getGammaEpsilonCount(rawData)
+def main(filename: str, useNumpy: bool = False) -> int:
+    if useNumpy:
+        values, bitLength = loadDiagnosticArray(filename)
+        gamma, epsilon = gammaEpsilon(numpyBitCounts(values, bitLength), len(values))
+        totalRates = gamma * epsilon
+        trie = DiagnosticTrie(values.tolist(), bitLength)
+    else:
+        with open(filename) as inputData:
+            rawData = inputData.readlines()
+
+        rawData = [line.rstrip("\n") for line in rawData]
+
+        totalRates = getGammaEpsilonCount(rawData)
+        trie = DiagnosticTrie(*parseDiagnostics(rawData))
     print(f"Part 1: {totalRates}")
 
-    oxygen = lifeSupportRating(rawData)
+    oxygen = trie.rating()
     print(f"{oxygen=}")
-    carbon = lifeSupportRating(rawData, True)
+    carbon = trie.rating(True)
     print(f"{carbon=}")
     print(f"Part 2: {oxygen*carbon}")
 
@@ -133,3 +227,66 @@ def test_lifeSupportRating_carbon(
     input_data: list[str], bool_val: bool, expected: int
 ) -> None:
     assert lifeSupportRating(input_data, bool_val) == expected
+
+
+@pytest.mark.parametrize(("input_data", "expected"), ((test_data, (22, 9)),))
+def test_gammaEpsilon(input_data: list[str], expected: tuple[int, int]) -> None:
+    assert gammaEpsilon(binaryCount(input_data), len(input_data)) == expected
+
+
+def test_numpyBitCounts() -> None:
+    pytest.importorskip("numpy")
+    values, bitLength = parseDiagnostics(test_data)
+    assert numpyBitCounts(values, bitLength) == binaryCount(test_data)
+
+
+def test_loadDiagnosticArray(tmp_path: pathlib.Path) -> None:
+    pytest.importorskip("numpy")
+    report = tmp_path / "report.txt"
+    report.write_text("\n".join(test_data) + "\n")
+
+    values, bitLength = loadDiagnosticArray(str(report))
+    assert (list(values), bitLength) == parseDiagnostics(test_data)
+
+
+@pytest.mark.parametrize(
+    ("input_data", "expected"),
+    (
+        (test_data, (23, 10)),
+        (["10", "01"], (2, 1)),
+        (["110", "011", "010"], (3, 6)),
+    ),
+)
+def test_DiagnosticTrie(input_data: list[str], expected: tuple[int, int]) -> None:
+    trie = DiagnosticTrie(*parseDiagnostics(input_data))
+    assert (trie.rating(), trie.rating(True)) == expected
+
+
+def test_DiagnosticReport() -> None:
+    report = DiagnosticReport(5, test_data[:6])
+    assert report.powerConsumption() == getGammaEpsilonCount(test_data[:6])
+    assert report.lifeSupport() == 23 * 4
+
+    report.extend(test_data[6:])
+    assert report.powerConsumption() == 198
+    assert report.lifeSupport() == 230
+
+
+def test_main_numpy(tmp_path: pathlib.Path, capsys: pytest.CaptureFixture[str]) -> None:
+    pytest.importorskip("numpy")
+    report = tmp_path / "report.txt"
+    report.write_text("\n".join(test_data) + "\n")
+
+    main(str(report), True)
+    output = capsys.readouterr().out
+    assert "Part 1: 198\n" in output
+    assert "Part 2: 230\n" in output
+
+
+@pytest.mark.parametrize("line", ("1111", "01"))
+def test_DiagnosticReport_width(line: str) -> None:
+    report = DiagnosticReport(3, ["101"])
+
+    with pytest.raises(ValueError):
+        report.add(line)
+    assert report.rowCount == 1
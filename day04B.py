@@ -4,53 +4,64 @@
 # final score be?
 import pprint as p
 from collections import Counter
+from collections import defaultdict
 from dataclasses import dataclass
+from typing import Any
 
 import pytest
 
 
 @dataclass
 class Board:
-    layout: list[list[dict[int, bool]]]
+    layout: list[list[int]]
+    marked: list[list[bool]]
+    rowHits: list[int]
+    colHits: list[int]
+    unmarkedSum: int
+    won: bool
     active: bool
 
     def __init__(self, boardlayout):
         self.layout = []
-        emptyList: list[tuple[int, bool]] = []
+        emptyList: list[int] = []
 
         for item in boardlayout:
-            emptyList.append({int(item): False})
+            emptyList.append(int(item))
 
             if len(emptyList) == 5:
                 self.layout.append(emptyList)
                 emptyList = []
 
+        self.marked = [[False] * 5 for _ in range(5)]
+        self.rowHits = [0] * 5
+        self.colHits = [0] * 5
+        self.unmarkedSum = sum(sum(row) for row in self.layout)
+        self.won = False
         self.active = True
 
     def score(self, finalNum: int) -> int:
-        score = 0
+        return self.unmarkedSum * finalNum
 
-        for row in self.layout:
-            for val in row:
-                if not next(iter(val.values())):
-                    score += next(iter(val.keys()))
+    def hasWon(self) -> bool:
+        return self.won
 
-        return score * finalNum
+    def markAt(self, row: int, col: int) -> None:
+        if self.marked[row][col]:
+            return
 
-    def hasWon(self) -> bool:
-        # Check rows
-        for x in range(5):
-            if all([next(iter(d.values())) for d in self.layout[x]]):
-                return True
-            elif all(all(self.layout[y][x].values()) for y in range(5)):
-                return True
+        self.marked[row][col] = True
+        self.unmarkedSum -= self.layout[row][col]
+        self.rowHits[row] += 1
+        self.colHits[col] += 1
 
-        return False
+        if self.rowHits[row] == 5 or self.colHits[col] == 5:
+            self.won = True
 
     def mark(self, num: int) -> None:
-        for row in self.layout:
-            for value in row:
-                value.update((num, True) for k, v in value.items() if k == num)
+        for row, values in enumerate(self.layout):
+            for col, value in enumerate(values):
+                if value == num:
+                    self.markAt(row, col)
 
 
 def bingoParser(rawData: str) -> tuple[list[int], list[Board]]:
@@ -62,36 +73,139 @@ def bingoParser(rawData: str) -> tuple[list[int], list[Board]]:
     return numberList, boardObjects
 
 
-def bingoSubsystem(rawData: str) -> int:
-    finalScore = 0
+def bingoTensorParser(rawData: str) -> tuple[list[int], Any, Any]:
+    # All boards as one (n_boards, 5, 5) int array plus a matching mark tensor
+    import numpy as np
+
+    numbers, _, boards = rawData.strip().partition("\n\n")
+    numberList = [int(i) for i in numbers.split(",")]
+    boardTensor = np.array(boards.split(), dtype=np.int32).reshape(-1, 5, 5)
+    markTensor = np.zeros(boardTensor.shape, dtype=bool)
+
+    return numberList, boardTensor, markTensor
+
+
+def tensorBingo(rawData: str) -> tuple[int, int]:
+    # Plays the game with whole-array marking and win checks, returns the
+    # scores of the first and last boards to win
+    import numpy as np
+
+    numberList, boardTensor, markTensor = bingoTensorParser(rawData)
+    won = np.zeros(len(boardTensor), dtype=bool)
+    firstScore = 0
+
+    for num in numberList:
+        markTensor |= boardTensor == num
+        nowWon = markTensor.all(axis=2).any(axis=1) | markTensor.all(axis=1).any(axis=1)
+        newWinners = np.flatnonzero(nowWon & ~won)
+        won = nowWon
+
+        if not len(newWinners):
+            continue
+
+        # Nobody had won before this draw
+        if len(newWinners) == np.count_nonzero(won):
+            idx = newWinners[0]
+            firstScore = int(boardTensor[idx][~markTensor[idx]].sum()) * num
+
+        if won.all():
+            idx = newWinners[-1]
+            lastScore = int(boardTensor[idx][~markTensor[idx]].sum()) * num
+            return firstScore, lastScore
+
+    return firstScore, 0
+
+
+def numberIndex(boardObjects: list[Board]) -> dict[int, list[tuple[int, int, int]]]:
+    # Every number maps to the (board, row, col) cells holding it, in board
+    # order, so a draw only touches the boards that contain it
+    index: defaultdict[int, list[tuple[int, int, int]]] = defaultdict(list)
+
+    for idx, board in enumerate(boardObjects):
+        for row, values in enumerate(board.layout):
+            for col, value in enumerate(values):
+                index[value].append((idx, row, col))
+
+    return index
+
+
+def boardOutcomes(
+    numberList: list[int], boardObjects: list[Board]
+) -> list[tuple[int, int]]:
+    # Each board wins on the turn its quickest line is complete, which is the
+    # smallest over its lines of the latest draw rank in that line. Boards
+    # that never win get len(numberList) as their turn and a score of 0.
+    never = len(numberList)
+    rank: dict[int, int] = {}
+    for turn, num in enumerate(numberList):
+        rank.setdefault(num, turn)
+
+    outcomes = []
+    for board in boardObjects:
+        ranks = [[rank.get(value, never) for value in row] for row in board.layout]
+        winTurn = min(min(max(line) for line in ranks), min(map(max, zip(*ranks))))
+
+        if winTurn == never:
+            outcomes.append((never, 0))
+            continue
+
+        unmarked = sum(
+            value
+            for values, turns in zip(board.layout, ranks)
+            for value, turn in zip(values, turns)
+            if turn > winTurn
+        )
+        outcomes.append((winTurn, unmarked * numberList[winTurn]))
+
+    return outcomes
+
+
+def bingoSubsystem(rawData: str, closedForm: bool = False) -> int:
     numberList, boardObjects = bingoParser(rawData)
 
+    if closedForm:
+        # First board to reach the earliest turn wins ties
+        return min(boardOutcomes(numberList, boardObjects), key=lambda o: o[0])[1]
+    index = numberIndex(boardObjects)
+
     for num in numberList:
-        for board in boardObjects:
-            board.mark(num)
+        for idx, row, col in index.get(num, ()):
+            board = boardObjects[idx]
+            board.markAt(row, col)
 
             if board.hasWon():
-                finalScore = board.score(num)
-                return finalScore
+                return board.score(num)
 
-    return finalScore
+    return 0
 
 
-def finalWinner(rawData: str) -> int:
+def finalWinner(rawData: str, closedForm: bool = False) -> int:
     numberList, boardObjects = bingoParser(rawData)
 
+    if closedForm:
+        outcomes = boardOutcomes(numberList, boardObjects)
+        if any(turn == len(numberList) for turn, _ in outcomes):
+            return 0
+
+        # Last board to reach the latest turn wins ties
+        return max(reversed(outcomes), key=lambda o: o[0])[1]
+    index = numberIndex(boardObjects)
+    remaining = len(boardObjects)
+
     for num in numberList:
-        for board in boardObjects:
+        for idx, row, col in index.get(num, ()):
+            board = boardObjects[idx]
             if not board.active:
                 continue
 
-            board.mark(num)
+            board.markAt(row, col)
 
             if board.hasWon():
                 board.active = False
+                remaining -= 1
 
-            if not any([i.active for i in boardObjects]):
-                return board.score(num)
+                if not remaining:
+                    return board.score(num)
 
     return 0
 
@@ -138,12 +252,43 @@ test_data = """
 
 
 # Part 1 test
-@pytest.mark.parametrize(("input_data", "expected"), ((test_data, 4512),))
-def test_bingoSubsystem(input_data: str, expected: int) -> None:
-    assert bingoSubsystem(input_data) == expected
+@pytest.mark.parametrize(
+    ("input_data", "closed_form", "expected"),
+    (
+        (test_data, False, 4512),
+        (test_data, True, 4512),
+    ),
+)
+def test_bingoSubsystem(input_data: str, closed_form: bool, expected: int) -> None:
+    assert bingoSubsystem(input_data, closed_form) == expected
 
 
 # Part 2 test
-@pytest.mark.parametrize(("input_data", "expected"), ((test_data, 1924),))
-def test_finalWinner(input_data: str, expected: int) -> None:
-    assert finalWinner(input_data) == expected
+@pytest.mark.parametrize(
+    ("input_data", "closed_form", "expected"),
+    (
+        (test_data, False, 1924),
+        (test_data, True, 1924),
+    ),
+)
+def test_finalWinner(input_data: str, closed_form: bool, expected: int) -> None:
+    assert finalWinner(input_data, closed_form) == expected
+
+
+def test_Board_mark() -> None:
+    _, boardObjects = bingoParser(test_data)
+    board = boardObjects[2]
+
+    for num in (14, 21, 17, 24):
+        board.mark(num)
+    assert not board.hasWon()
+
+    board.mark(4)
+    assert board.hasWon()
+    assert board.score(4) == (325 - 14 - 21 - 17 - 24 - 4) * 4
+
+
+@pytest.mark.parametrize(("input_data", "expected"), ((test_data, (4512, 1924)),))
+def test_tensorBingo(input_data: str, expected: tuple[int, int]) -> None:
+    pytest.importorskip("numpy")
+    assert tensorBingo(input_data) == expected
@@ -2,13 +2,29 @@
 # at least two lines overlap?
 # Part 2: Unfortunately, considering only horizontal and vertical lines doesn't
 # give you the full picture; you need to also consider diagonal lines.
+from __future__ import annotations
+
+import bisect
+import itertools
+import os
 import pprint as p
+import re
+from array import array
 from collections import Counter
+from collections import defaultdict
+from collections.abc import Iterable
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+from typing import NamedTuple
+from typing import Optional
 
 import pytest
 
 
 class Coordinate:
+    __slots__ = ("x1", "y1", "x2", "y2")
+
     x1: int
     y1: int
     x2: int
@@ -26,16 +42,351 @@ class Coordinate:
         self.y2 = int(chunk2[1])
 
 
-def ventMapping(rawData: list[str], get_diagonals: bool = False) -> int:
-    safe_routes = 0
-    coordinates = []
+class Segment(NamedTuple):
+    x1: int
+    y1: int
+    x2: int
+    y2: int
+
+
+NUMBER_PATTERN = re.compile(r"-?\d+")
+
+
+def parseSegments(rawData: Iterable[str]) -> array[int]:
+    # The whole segment file as a flat int32 buffer of x1, y1, x2, y2 rows
+    segments: array[int] = array("i")
 
     for line in rawData:
-        coordinates.append(Coordinate(line))
+        if not line.strip():
+            continue
+
+        numbers = NUMBER_PATTERN.findall(line)
+        if len(numbers) != 4:
+            raise ValueError(f"Malformed segment: {line!r}")
+
+        segments.extend(map(int, numbers))
+
+    return segments
+
+
+def iterSegments(segments: array[int]) -> Iterator[Segment]:
+    rows = [iter(segments)] * 4
+
+    return itertools.starmap(Segment, zip(*rows))
+
+
+def rasterise(segments: Any) -> tuple[Any, Any]:
+    # Every lattice point of every (x1, y1, x2, y2) row, as two flat arrays.
+    # Rows have to be horizontal, vertical or 45 degree diagonals.
+    import numpy as np
+
+    x1, y1, x2, y2 = segments.T
+    step_x = np.sign(x2 - x1)
+    step_y = np.sign(y2 - y1)
+    lengths = np.maximum(abs(x2 - x1), abs(y2 - y1)) + 1
+
+    owner = np.repeat(np.arange(len(segments)), lengths)
+    starts = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    offsets = np.arange(lengths.sum()) - starts
+
+    return x1[owner] + step_x[owner] * offsets, y1[owner] + step_y[owner] * offsets
+
+
+def denseVentMapping(segmentBuffer: array[int], get_diagonals: bool) -> int:
+    import numpy as np
+
+    segments = np.frombuffer(segmentBuffer, dtype=np.int32).reshape(-1, 4)
+    segments = segments.astype(np.int64)
+    x1, y1, x2, y2 = segments.T
+
+    keep = (x1 == x2) | (y1 == y2)
+    if get_diagonals:
+        keep |= abs(x1 - x2) == abs(y1 - y2)
+    segments = segments[keep]
+
+    if not len(segments):
+        return 0
+
+    # uint16 only overflows once more than 65535 segments share a point
+    dtype = np.uint16 if len(segments) < 2**16 else np.uint32
+    # The grid only spans the coordinate bounds, which may be negative
+    min_x, max_x = segments[:, [0, 2]].min(), segments[:, [0, 2]].max()
+    min_y, max_y = segments[:, [1, 3]].min(), segments[:, [1, 3]].max()
+    grid = np.zeros((max_y - min_y + 1, max_x - min_x + 1), dtype=dtype)
+
+    xs, ys = rasterise(segments)
+    np.add.at(grid, (ys - min_y, xs - min_x), 1)
+
+    return int(np.count_nonzero(grid >= 2))
+
+
+# Each family of parallel segments lies on lines ax * x + ay * y = key
+FAMILIES = {
+    "horizontal": (0, 1),
+    "vertical": (1, 0),
+    "rising": (-1, 1),
+    "falling": (1, 1),
+}
+
+
+def lineOverlaps(spans: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    # Inclusive ranges covered by at least two of the spans on one line
+    starts = ((lo, 1) for lo, _ in spans)
+    ends = ((hi + 1, -1) for _, hi in spans)
+    events = sorted(itertools.chain(starts, ends))
+    overlaps: list[tuple[int, int]] = []
+    depth = 0
+    start = 0
+
+    for pos, change in events:
+        if depth + change >= 2 > depth:
+            start = pos
+        elif depth >= 2 > depth + change and pos > start:
+            if overlaps and overlaps[-1][1] == start - 1:
+                overlaps[-1] = (overlaps[-1][0], pos - 1)
+            else:
+                overlaps.append((start, pos - 1))
+        depth += change
+
+    return overlaps
+
+
+def reproject(
+    name: str, key: int, span: tuple[int, int], axis: tuple[int, int]
+) -> tuple[int, int]:
+    # Range of ax * x + ay * y along one segment of the named family
+    ax, ay = axis
+    lo, hi = span
+
+    if name == "vertical":
+        ends = [ax * key + ay * lo, ax * key + ay * hi]
+    else:
+        # Every other family has ay == 1, so y follows from x and the key
+        bx, _ = FAMILIES[name]
+        ends = [ax * x + ay * (key - bx * x) for x in (lo, hi)]
+
+    return min(ends), max(ends)
+
+
+def orthogonalCrossings(
+    flats: list[tuple[int, int, int]], uprights: list[tuple[int, int, int]]
+) -> Iterator[tuple[int, int]]:
+    # flats are (b, a_lo, a_hi) and uprights are (a, b_lo, b_hi); yields each
+    # distinct (a, b) where a flat meets an upright. Sweeps along a, keeping
+    # the b of every open flat in a sorted list.
+    events = sorted(
+        itertools.chain(
+            ((lo, 0, b, b) for b, lo, hi in flats),
+            ((a, 1, lo, hi) for a, lo, hi in uprights),
+            ((hi, 2, b, b) for b, lo, hi in flats),
+        )
+    )
+    active: list[int] = []
+    openCount: Counter[int] = Counter()
+
+    for a, kind, lo, hi in events:
+        if kind == 0:
+            if not openCount[lo]:
+                bisect.insort(active, lo)
+            openCount[lo] += 1
+        elif kind == 1:
+            first = bisect.bisect_left(active, lo)
+            last = bisect.bisect_right(active, hi)
+            for b in active[first:last]:
+                yield a, b
+        else:
+            openCount[lo] -= 1
+            if not openCount[lo]:
+                del active[bisect.bisect_left(active, lo)]
+
+
+def sweepVentMapping(segments: array[int], get_diagonals: bool) -> int:
+    # Works on whole segments, never on the points inside them, so the cost
+    # depends on the number of segments and crossings rather than lengths
+    lines: dict[str, defaultdict[int, list[tuple[int, int]]]] = {
+        name: defaultdict(list) for name in FAMILIES
+    }
+
+    for point in iterSegments(segments):
+        if point.x1 == point.x2:
+            name = "vertical"
+        elif point.y1 == point.y2:
+            name = "horizontal"
+        elif get_diagonals and abs(point.x1 - point.x2) == abs(point.y1 - point.y2):
+            rising = (point.x2 - point.x1) == (point.y2 - point.y1)
+            name = "rising" if rising else "falling"
+        else:
+            continue
+
+        ax, ay = FAMILIES[name]
+        key = ax * point.x1 + ay * point.y1
+        if name == "vertical":
+            span = (min(point.y1, point.y2), max(point.y1, point.y2))
+        else:
+            span = (min(point.x1, point.x2), max(point.x1, point.x2))
+        lines[name][key].append(span)
+
+    # Points where parallel segments on the same line overlap
+    overlaps = {
+        name: {key: lineOverlaps(spans) for key, spans in family.items()}
+        for name, family in lines.items()
+    }
+    safe_routes = sum(
+        hi - lo + 1
+        for family in overlaps.values()
+        for ranges in family.values()
+        for lo, hi in ranges
+    )
+
+    def overlapFamilies(x: int, y: int) -> int:
+        found = 0
+        for name, (ax, ay) in FAMILIES.items():
+            ranges = overlaps[name].get(ax * x + ay * y, [])
+            pos = y if name == "vertical" else x
+            idx = bisect.bisect_right(ranges, pos, key=lambda r: r[0]) - 1
+            if idx >= 0 and ranges[idx][0] <= pos <= ranges[idx][1]:
+                found += 1
+        return found
+
+    # Points where segments from two different families cross. Each family's
+    # key becomes one sweep axis, and the span of the other family's segments
+    # is re-expressed along that axis.
+    crossings: set[tuple[int, int]] = set()
+    for first, second in itertools.combinations(FAMILIES, 2):
+        fx, fy = FAMILIES[first]
+        sx, sy = FAMILIES[second]
+        det = fx * sy - fy * sx
+
+        flats = [
+            (key, *reproject(first, key, span, (sx, sy)))
+            for key, spans in lines[first].items()
+            for span in spans
+        ]
+        uprights = [
+            (key, *reproject(second, key, span, (fx, fy)))
+            for key, spans in lines[second].items()
+            for span in spans
+        ]
+
+        for secondKey, firstKey in orthogonalCrossings(flats, uprights):
+            x, xRem = divmod(firstKey * sy - fy * secondKey, det)
+            y, yRem = divmod(fx * secondKey - firstKey * sx, det)
+            if not xRem and not yRem:
+                crossings.add((x, y))
+
+    # A crossing adds a point unless an overlap already counted it, and a
+    # point inside overlaps of several families was counted once per family
+    for x, y in crossings:
+        safe_routes += 1 - overlapFamilies(x, y)
+
+    return safe_routes
+
+
+def clipToTiles(
+    point: Segment, tileSize: int
+) -> Iterator[tuple[tuple[int, int], tuple[int, int, int, int]]]:
+    # Splits a segment into the pieces that fall inside each tile it crosses
+    step_x = (point.x2 > point.x1) - (point.x2 < point.x1)
+    step_y = (point.y2 > point.y1) - (point.y2 < point.y1)
+    remaining = max(abs(point.x2 - point.x1), abs(point.y2 - point.y1)) + 1
+    x, y = point.x1, point.y1
+
+    while remaining:
+        tile_x, tile_y = x // tileSize, y // tileSize
+
+        # Points left before the walk leaves this tile along either axis
+        steps = remaining
+        if step_x > 0:
+            steps = min(steps, (tile_x + 1) * tileSize - x)
+        elif step_x < 0:
+            steps = min(steps, x - tile_x * tileSize + 1)
+        if step_y > 0:
+            steps = min(steps, (tile_y + 1) * tileSize - y)
+        elif step_y < 0:
+            steps = min(steps, y - tile_y * tileSize + 1)
+
+        end_x = x + step_x * (steps - 1)
+        end_y = y + step_y * (steps - 1)
+        yield (tile_x, tile_y), (x, y, end_x, end_y)
+
+        x, y = end_x + step_x, end_y + step_y
+        remaining -= steps
+
+
+def countTile(
+    origin: tuple[int, int], tileSize: int, segments: list[tuple[int, int, int, int]]
+) -> int:
+    # Small per-tile grid, cells saturate at 2 since only overlaps matter
+    grid = bytearray(tileSize * tileSize)
+    origin_x, origin_y = origin
+
+    for x1, y1, x2, y2 in segments:
+        step_x = (x2 > x1) - (x2 < x1)
+        step_y = (y2 > y1) - (y2 < y1)
+        cell = (y1 - origin_y) * tileSize + (x1 - origin_x)
+        stride = step_y * tileSize + step_x
+
+        for _ in range(max(abs(x2 - x1), abs(y2 - y1)) + 1):
+            if grid[cell] < 2:
+                grid[cell] += 1
+            cell += stride
+
+    return grid.count(2)
+
+
+def tiledVentMapping(
+    segments: array[int],
+    get_diagonals: bool,
+    tileSize: int = 1024,
+    workers: Optional[int] = None,
+) -> int:
+    tiles: defaultdict[tuple[int, int], list[tuple[int, int, int, int]]]
+    tiles = defaultdict(list)
+
+    for point in iterSegments(segments):
+        if not (
+            point.x1 == point.x2
+            or point.y1 == point.y2
+            or get_diagonals
+            and abs(point.x1 - point.x2) == abs(point.y1 - point.y2)
+        ):
+            continue
+
+        for tile, piece in clipToTiles(point, tileSize):
+            tiles[tile].append(piece)
+
+    if not tiles:
+        return 0
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        return sum(
+            pool.map(
+                countTile,
+                [(x * tileSize, y * tileSize) for x, y in tiles],
+                [tileSize] * len(tiles),
+                tiles.values(),
+            )
+        )
+
+
+def ventMapping(
+    rawData: list[str], get_diagonals: bool = False, engine: str = "counter"
+) -> int:
+    safe_routes = 0
+    segments = parseSegments(rawData)
+
+    if engine == "dense":
+        return denseVentMapping(segments, get_diagonals)
+    elif engine == "sweep":
+        return sweepVentMapping(segments, get_diagonals)
+    elif engine == "tiled":
+        return tiledVentMapping(segments, get_diagonals)
+    elif engine != "counter":
+        raise ValueError(f"Unknown engine: {engine}")
 
     map_cords: Counter[tuple[int, int]] = Counter()
 
-    for point in coordinates:
+    for point in iterSegments(segments):
 
         if point.x1 == point.x2:
             for i in range(min(point.y1, point.y2), max(point.y1, point.y2) + 1):
@@ -113,3 +464,58 @@ test_data = [
 )
 def test_ventMapping(input_data: list[str], boolean: bool, expected: int) -> None:
     assert ventMapping(input_data, boolean) == expected
+
+
+@pytest.mark.parametrize(
+    ("input_data", "boolean", "expected"),
+    (
+        (test_data, False, 5),
+        (test_data, True, 12),
+        ([], True, 0),
+        (["-3,0 -> 0,0", "-1,-2 -> -1,2", "2,3 -> -2,-1", "-3,0 -> -1,0"], True, 3),
+    ),
+)
+def test_ventMapping_dense(input_data: list[str], boolean: bool, expected: int) -> None:
+    pytest.importorskip("numpy")
+    assert ventMapping(input_data, boolean, "dense") == expected
+
+
+@pytest.mark.parametrize(
+    ("input_data", "boolean", "expected"),
+    (
+        (test_data, False, 5),
+        (test_data, True, 12),
+        (["0,0 -> 0,1000000000", "5,7 -> 0,7", "0,3 -> 0,99999999"], False, 99999997),
+        (["0,0 -> 4,4", "0,4 -> 4,0", "0,1 -> 3,4", "2,0 -> 2,4"], True, 2),
+    ),
+)
+def test_ventMapping_sweep(input_data: list[str], boolean: bool, expected: int) -> None:
+    assert ventMapping(input_data, boolean, "sweep") == expected
+
+
+@pytest.mark.parametrize(
+    ("input_data", "boolean", "tile_size", "expected"),
+    (
+        (test_data, False, 1024, 5),
+        (test_data, True, 1024, 12),
+        (test_data, False, 3, 5),
+        (test_data, True, 3, 12),
+        (test_data, True, 1, 12),
+    ),
+)
+def test_tiledVentMapping(
+    input_data: list[str], boolean: bool, tile_size: int, expected: int
+) -> None:
+    segments = parseSegments(input_data)
+    assert tiledVentMapping(segments, boolean, tile_size, 2) == expected
+
+
+def test_parseSegments() -> None:
+    segments = parseSegments(line + "\n" for line in test_data[:2])
+    assert list(iterSegments(segments)) == [(0, 9, 5, 9), (8, 0, 0, 8)]
+
+    with pytest.raises(ValueError):
+        parseSegments(["1,2 -> 3,4", "junk 5", "6,7 -> 8,9"])
+
+    point = Coordinate(test_data[1])
+    assert (point.x1, point.y1, point.x2, point.y2) == (8, 0, 0, 8)
@@ -1,21 +1,33 @@
 # Part 1: Find a way to simulate lanternfish. How many lanternfish would there
 # be after 80 days?
 # Part 2: How many lanternfish would there be after 256 days?
+import mmap
+import os
+import pathlib
+import struct
+import tempfile
+from collections import deque
+from typing import Optional
+
 import pytest
 
+Matrix = list[list[int]]
+
+
+def fishHistogram(rawData: list[int]) -> list[int]:
+    # Number of fish per timer value, built in a single pass
+    histogram = [0] * 9
+
+    for timer in rawData:
+        if not 0 <= timer <= 8:
+            raise ValueError(f"Timer {timer} is outside 0-8")
+        histogram[timer] += 1
+
+    return histogram
+
 
 def fishBreeder(rawData: list[int], day_length: int) -> int:
-    currentGen = {
-        0: rawData.count(0),
-        1: rawData.count(1),
-        2: rawData.count(2),
-        3: rawData.count(3),
-        4: rawData.count(4),
-        5: rawData.count(5),
-        6: rawData.count(6),
-        7: rawData.count(7),
-        8: rawData.count(8),
-    }
+    currentGen = dict(enumerate(fishHistogram(rawData)))
 
     for _ in range(day_length):
         # Move each value down 1 in the list
@@ -34,6 +46,182 @@ def fishBreeder(rawData: list[int], day_length: int) -> int:
     return sum(currentGen.values())
 
 
+def transitionMatrix() -> Matrix:
+    # new[i] = sum(matrix[i][j] * old[j]) for one day of breeding
+    matrix = [[0] * 9 for _ in range(9)]
+
+    for timer in range(8):
+        matrix[timer][timer + 1] = 1
+
+    matrix[6][0] = 1
+    matrix[8][0] = 1
+
+    return matrix
+
+
+def matMul(a: Matrix, b: Matrix, modulus: Optional[int] = None) -> Matrix:
+    columns = list(zip(*b))
+    product = [[sum(x * y for x, y in zip(row, col)) for col in columns] for row in a]
+
+    if modulus is not None:
+        product = [[val % modulus for val in row] for row in product]
+
+    return product
+
+
+def matPow(matrix: Matrix, power: int, modulus: Optional[int] = None) -> Matrix:
+    # Repeated squaring, O(log power) multiplies
+    if power < 0:
+        raise ValueError(f"Power must not be negative: {power}")
+
+    result = [[int(i == j) for j in range(len(matrix))] for i in range(len(matrix))]
+
+    while power:
+        if power & 1:
+            result = matMul(result, matrix, modulus)
+        matrix = matMul(matrix, matrix, modulus)
+        power >>= 1
+
+    return result
+
+
+def fastFishBreeder(
+    rawData: list[int], day_length: int, modulus: Optional[int] = None
+) -> int:
+    # Exact by default, or reduced modulo `modulus` all the way through
+    if day_length < 0:
+        raise ValueError(f"Day length must not be negative: {day_length}")
+
+    histogram = fishHistogram(rawData)
+    matrix = matPow(transitionMatrix(), day_length, modulus)
+    total = sum(sum(col) * count for col, count in zip(zip(*matrix), histogram))
+
+    return total if modulus is None else total % modulus
+
+
+def batchFishBreeder(rawData: list[int], day_lengths: list[int]) -> list[int]:
+    # One simulation swept through the horizons in ascending order, answers
+    # come back in the order they were asked for
+    if any(horizon < 0 for horizon in day_lengths):
+        raise ValueError(f"Day lengths must not be negative: {day_lengths}")
+
+    school = deque(fishHistogram(rawData))
+    answers: dict[int, int] = {}
+    day = 0
+
+    for horizon in sorted(set(day_lengths)):
+        for _ in range(horizon - day):
+            school.rotate(-1)
+            school[6] += school[8]
+
+        day = horizon
+        answers[horizon] = sum(school)
+
+    return [answers[horizon] for horizon in day_lengths]
+
+
+def contributionTable(horizon: int) -> list[list[int]]:
+    # contribution[timer][day] is the school size after `day` days that grew
+    # from a single fish starting on `timer`
+    zero = [1] * (horizon + 1)
+    for day in range(1, horizon + 1):
+        # The fish resets to 6 and spawns an 8 the day after hitting 0
+        zero[day] = (zero[day - 7] if day > 7 else 1) + (
+            zero[day - 9] if day > 9 else 1
+        )
+
+    return [
+        [1 if day <= timer else zero[day - timer] for day in range(horizon + 1)]
+        for timer in range(9)
+    ]
+
+
+TABLE_HEADER = struct.Struct("<QQ")
+
+
+class ContributionTable:
+    # On-disk contribution table, memory-mapped read-only. The header holds
+    # the horizon and the byte width of each cell, cells are little-endian
+    # unsigned ints stored timer-major.
+    horizon: int
+    width: int
+    buffer: mmap.mmap
+
+    def __init__(self, path: str, horizon: int):
+        layout = self.storedLayout(path)
+        if layout is None or layout[0] < horizon:
+            self.write(path, horizon)
+
+        with open(path, "rb") as tableFile:
+            self.buffer = mmap.mmap(tableFile.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.horizon, self.width = TABLE_HEADER.unpack_from(self.buffer)
+        if len(self.buffer) != self.tableSize(self.horizon, self.width):
+            self.buffer.close()
+            raise ValueError(f"Contribution table {path} has the wrong size")
+
+    @staticmethod
+    def tableSize(horizon: int, width: int) -> int:
+        return TABLE_HEADER.size + 9 * (horizon + 1) * width
+
+    @classmethod
+    def storedLayout(cls, path: str) -> Optional[tuple[int, int]]:
+        # (horizon, width) of the table on disk, None if it is missing or
+        # its length does not match its header
+        if not os.path.exists(path):
+            return None
+
+        with open(path, "rb") as tableFile:
+            header = tableFile.read(TABLE_HEADER.size)
+
+        if len(header) < TABLE_HEADER.size:
+            return None
+
+        horizon, width = TABLE_HEADER.unpack(header)
+        if os.path.getsize(path) != cls.tableSize(horizon, width):
+            return None
+        return horizon, width
+
+    @staticmethod
+    def write(path: str, horizon: int) -> None:
+        # Built next to the target and swapped in, so tables that are already
+        # mapped keep their pages
+        table = contributionTable(horizon)
+        width = (max(max(row) for row in table).bit_length() + 7) // 8
+
+        handle, tempPath = tempfile.mkstemp(dir=os.path.dirname(path) or ".")
+        try:
+            with os.fdopen(handle, "wb") as tableFile:
+                tableFile.write(TABLE_HEADER.pack(horizon, width))
+                for row in table:
+                    tableFile.write(
+                        b"".join(val.to_bytes(width, "little") for val in row)
+                    )
+            os.replace(tempPath, path)
+        except BaseException:
+            os.remove(tempPath)
+            raise
+
+    def value(self, timer: int, day: int) -> int:
+        if not 0 <= timer <= 8:
+            raise ValueError(f"Timer {timer} is outside 0-8")
+        if not 0 <= day <= self.horizon:
+            raise ValueError(f"Day {day} is outside the table horizon {self.horizon}")
+
+        offset = TABLE_HEADER.size + (timer * (self.horizon + 1) + day) * self.width
+        return int.from_bytes(self.buffer[offset : offset + self.width], "little")
+
+    def school(self, histogram: list[int], day: int) -> int:
+        return sum(
+            count * self.value(timer, day)
+            for timer, count in enumerate(histogram)
+            if count
+        )
+
+    def close(self) -> None:
+        self.buffer.close()
+
+
 def main(filename: str) -> int:
     with open(filename) as inputData:
         rawData = inputData.read()
@@ -41,11 +229,9 @@ def main(filename: str) -> int:
     # Convert to ints
     data = list(map(int, rawData.split(",")))
 
-    fishes = fishBreeder(data, 80)
-    print(f"Part 1: {fishes}")
-
-    fishes = fishBreeder(data, 256)
-    print(f"Part 2: {fishes}")
+    part1, part2 = batchFishBreeder(data, [80, 256])
+    print(f"Part 1: {part1}")
+    print(f"Part 2: {part2}")
 
     return 0
 
@@ -69,3 +255,106 @@ test_data = [3, 4, 3, 1, 2]
 )
 def test_fishBreeder(input_data: list[int], input_length: int, expected: int) -> None:
     assert fishBreeder(input_data, input_length) == expected
+
+
+@pytest.mark.parametrize(
+    ("input_data", "input_length", "modulus", "expected"),
+    (
+        (test_data, 18, None, 26),
+        (test_data, 80, None, 5934),
+        (test_data, 256, None, 26984457539),
+        (test_data, 256, 1_000_000_007, 26984457539 % 1_000_000_007),
+        (test_data, 0, None, 5),
+    ),
+)
+def test_fastFishBreeder(
+    input_data: list[int], input_length: int, modulus: Optional[int], expected: int
+) -> None:
+    assert fastFishBreeder(input_data, input_length, modulus) == expected
+
+
+@pytest.mark.parametrize(
+    ("input_data", "input_lengths", "expected"),
+    (
+        (test_data, [80, 18, 256, 18], [5934, 26, 26984457539, 26]),
+        (test_data, [0], [5]),
+        (test_data, [], []),
+    ),
+)
+def test_batchFishBreeder(
+    input_data: list[int], input_lengths: list[int], expected: list[int]
+) -> None:
+    assert batchFishBreeder(input_data, input_lengths) == expected
+
+
+@pytest.mark.parametrize(
+    ("input_data", "input_length", "expected"),
+    (
+        (test_data, 0, 5),
+        (test_data, 18, 26),
+        (test_data, 80, 5934),
+        (test_data, 256, 26984457539),
+    ),
+)
+def test_ContributionTable(
+    tmp_path: pathlib.Path, input_data: list[int], input_length: int, expected: int
+) -> None:
+    table = ContributionTable(str(tmp_path / "table.bin"), 256)
+    assert table.school(fishHistogram(input_data), input_length) == expected
+    table.close()
+
+
+def test_ContributionTable_grows(tmp_path: pathlib.Path) -> None:
+    path = str(tmp_path / "table.bin")
+    ContributionTable(path, 18).close()
+
+    table = ContributionTable(path, 80)
+    assert table.horizon == 80
+    assert table.school(fishHistogram(test_data), 80) == 5934
+    table.close()
+
+
+def test_ContributionTable_rebuilds_truncated(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "table.bin"
+    ContributionTable(str(path), 256).close()
+    path.write_bytes(path.read_bytes()[:-100])
+
+    table = ContributionTable(str(path), 256)
+    assert table.school(fishHistogram(test_data), 256) == 26984457539
+    assert table.value(8, 256) == contributionTable(256)[8][256]
+    table.close()
+
+
+def test_ContributionTable_rebuild_keeps_open_maps(tmp_path: pathlib.Path) -> None:
+    path = str(tmp_path / "table.bin")
+    old = ContributionTable(path, 18)
+    new = ContributionTable(path, 80)
+
+    assert old.school(fishHistogram(test_data), 18) == 26
+    assert new.school(fishHistogram(test_data), 80) == 5934
+    old.close()
+    new.close()
+
+
+@pytest.mark.parametrize(("timer", "day"), ((-1, 0), (9, 0), (0, 19)))
+def test_ContributionTable_bounds(tmp_path: pathlib.Path, timer: int, day: int) -> None:
+    table = ContributionTable(str(tmp_path / "table.bin"), 18)
+    with pytest.raises(ValueError):
+        table.value(timer, day)
+    table.close()
+
+
+def test_fastFishBreeder_negative_days() -> None:
+    with pytest.raises(ValueError):
+        fastFishBreeder(test_data, -1)
+
+
+def test_batchFishBreeder_negative_days() -> None:
+    with pytest.raises(ValueError):
+        batchFishBreeder(test_data, [80, -5])
+
+
+@pytest.mark.parametrize("timer", (-1, 9))
+def test_fishHistogram_bad_timer(timer: int) -> None:
+    with pytest.raises(ValueError):
+        fishHistogram([3, timer])
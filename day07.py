@@ -3,16 +3,54 @@
 # position?
 # Part 2: As it turns out, crab submarine engines don't burn fuel at a constant
 # rate. How much fuel must they spend to align to that position?
-import math
+import itertools
+import random
+from collections.abc import Callable
+from typing import Any
 
 import pytest
 
+# A cost model prices a group of moves from (moves, sum of distances, sum of
+# squared distances), so anything of the form a + b*d + c*d**2 per crab fits
+CostModel = Callable[[int, int, int], int]
+
+
+def linear_cost(moves: int, distance: int, square_distance: int) -> int:
+    return distance
+
+
+def triangular_cost(moves: int, distance: int, square_distance: int) -> int:
+    return (square_distance + distance) // 2
+
+
+def select(data: Any, k: int) -> int:
+    # k-th smallest value in expected O(n) without touching the input.
+    # Arrays go through np.partition, which works on a copy.
+    if hasattr(data, "__array__"):
+        import numpy as np
+
+        return int(np.partition(data, k)[k])
+
+    candidates = list(data)
+    while True:
+        pivot = random.choice(candidates)
+        lower = [item for item in candidates if item < pivot]
+        higher = [item for item in candidates if item > pivot]
+        equal = len(candidates) - len(lower) - len(higher)
+
+        if k < len(lower):
+            candidates = lower
+        elif k < len(lower) + equal:
+            return pivot
+        else:
+            k -= len(lower) + equal
+            candidates = higher
+
 
 def crab_Alignment(data: list[int]) -> int:
     fuel_Count = 0
 
-    data.sort()
-    median = data[len(data) // 2]
+    median = select(data, len(data) // 2)
 
     for item in data:
         fuel_Count += abs(item - median)
@@ -20,21 +58,68 @@ def crab_Alignment(data: list[int]) -> int:
     return fuel_Count
 
 
-def exponential_crab_alignment(data: list[int]) -> int:
-    fuel_count = 0
-
-    data.sort()
-    # In this case, it's the mean +- 1
-    mean = int(sum(data) / len(data))  # If this doesn't work, use the one below
-    # mean = math.ceil(sum(data) / len(data))
+def triangular_fuel(data: list[int], target: int) -> int:
+    # Moving n steps costs 1 + 2 + ... + n
+    return sum(abs(item - target) * (abs(item - target) + 1) // 2 for item in data)
 
-    for item in data:
-        values = abs(mean - item)
 
-        for elem in range(values):
-            fuel_count += elem + 1
-
-    return fuel_count
+def exponential_crab_alignment(data: list[int]) -> int:
+    # The total cost is convex and its real-valued minimum sits within half a
+    # step of the mean, so the best integer is in [mean - 1/2, mean + 1/2]
+    # rounded outwards: at most three candidates to try
+    total, count = sum(data), len(data)
+    lowest = (2 * total - count) // (2 * count)
+    highest = -(-(2 * total + count) // (2 * count))
+
+    return min(triangular_fuel(data, pos) for pos in range(lowest, highest + 1))
+
+
+class CrabFleet:
+    # Histogram of crab positions with prefix sums of count, position and
+    # squared position, so the fuel for any target is O(1)
+    lowest: int
+    counts: list[int]
+    sums: list[int]
+    squares: list[int]
+
+    def __init__(self, data: list[int]):
+        self.lowest = min(data)
+        histogram = [0] * (max(data) - self.lowest + 1)
+        for item in data:
+            histogram[item - self.lowest] += 1
+
+        positions = range(self.lowest, self.lowest + len(histogram))
+        weighted = [n * pos for n, pos in zip(histogram, positions)]
+        squared = [n * pos * pos for n, pos in zip(histogram, positions)]
+
+        self.counts = [0, *itertools.accumulate(histogram)]
+        self.sums = [0, *itertools.accumulate(weighted)]
+        self.squares = [0, *itertools.accumulate(squared)]
+
+    def fuel(self, target: int, cost: CostModel) -> int:
+        split = min(max(target - self.lowest + 1, 0), len(self.counts) - 1)
+
+        # Crabs at or left of the target move right, the rest move left
+        left = self.counts[split]
+        left_sum = self.sums[split]
+        left_squares = self.squares[split]
+        right = self.counts[-1] - left
+        right_sum = self.sums[-1] - left_sum
+        right_squares = self.squares[-1] - left_squares
+
+        return cost(
+            left,
+            left * target - left_sum,
+            left * target * target - 2 * target * left_sum + left_squares,
+        ) + cost(
+            right,
+            right_sum - right * target,
+            right_squares - 2 * target * right_sum + right * target * target,
+        )
+
+    def cheapest(self, cost: CostModel) -> int:
+        positions = range(self.lowest, self.lowest + len(self.counts) - 1)
+        return min(self.fuel(pos, cost) for pos in positions)
 
 
 def main(filename: str) -> int:
@@ -69,6 +154,53 @@ def test_crab_Alignment(input_data: list[int], expected: int) -> None:
 
 
 # Part 2 test
-@pytest.mark.parametrize(("input_data", "expected"), ((test_data, 168),))
+@pytest.mark.parametrize(
+    ("input_data", "expected"),
+    (
+        (test_data, 168),
+        ([0, 0, 0, 13], 73),
+        ([5], 0),
+        ([10**17 + 3, 10**17 + 4, 10**17 + 4, 10**17 + 9], 15),
+    ),
+)
 def test_exponential_crab_alignment(input_data: list[int], expected: int) -> None:
     assert exponential_crab_alignment(input_data) == expected
+
+
+@pytest.mark.parametrize(
+    ("input_data", "cost", "expected"),
+    (
+        (test_data, linear_cost, 37),
+        (test_data, triangular_cost, 168),
+        ([3, 3], triangular_cost, 0),
+    ),
+)
+def test_CrabFleet(input_data: list[int], cost: CostModel, expected: int) -> None:
+    assert CrabFleet(input_data).cheapest(cost) == expected
+
+
+def test_CrabFleet_fuel() -> None:
+    fleet = CrabFleet(test_data)
+    assert fleet.fuel(2, linear_cost) == 37
+    assert fleet.fuel(10, linear_cost) == 71
+    assert fleet.fuel(5, triangular_cost) == 168
+    assert fleet.fuel(-3, linear_cost) == sum(test_data) + 3 * len(test_data)
+
+
+def test_crab_Alignment_leaves_input() -> None:
+    data = list(test_data)
+    crab_Alignment(data)
+    exponential_crab_alignment(data)
+    assert data == test_data
+
+
+@pytest.mark.parametrize("k", range(len(test_data)))
+def test_select(k: int) -> None:
+    assert select(test_data, k) == sorted(test_data)[k]
+
+
+def test_select_array() -> None:
+    np = pytest.importorskip("numpy")
+    data = np.array(test_data)
+    assert select(data, len(test_data) // 2) == 2
+    assert data.tolist() == test_data
@@ -2,7 +2,6 @@
 # Part 2: For each entry, determine all of the wire/segment connections and
 # decode the four-digit output values. What do you get if you add up all of the
 # output values?
-import itertools
 from collections import defaultdict
 
 import pytest
@@ -51,45 +50,75 @@ def identify_unique_segments(rawData: list[str]) -> int:
     return unique_segments
 
 
-def validate_perm(perm: tuple[str, ...], line: str) -> bool:
-    words = line.split(" ")
+# Bit i of a mask is segment i, or wire "abcdefg"[i] before decoding
+DIGITS = {
+    sum(1 << idx for idx in segments): digit for digit, segments in MAPPING.items()
+}
 
-    for digit in range(10):
-        needed = {perm[idx] for idx in MAPPING[digit]}
+# Across the ten digits segment b is lit 6 times, e 4 times and f 9 times,
+# while a/c share 8 and d/g share 7
+SEGMENT_FREQUENCIES = {6: 1, 4: 4, 9: 5}
 
-        if not any(needed == set(word) for word in words):
-            return False
 
-    return True
+def word_mask(word: str) -> int:
+    mask = 0
 
+    for letter in word:
+        mask |= 1 << (ord(letter) - ord("a"))
 
-def calculate_output_vals(rawData: list[str]) -> int:
-    parsed_data = parse_records(rawData)
-    total_output = 0
+    return mask
 
-    for line in parsed_data:
-        for perm in itertools.permutations("abcdefg"):
-            is_valid = validate_perm(perm, line[0])
 
-            if is_valid:
-                break
+def decode_wires(patterns: list[int]) -> list[int]:
+    # Works out which segment each wire drives from how often it shows up
+    # in the ten pattern masks, plus the digits 1 and 4 to split the shared
+    # counts. Index i of the result is the segment wire i drives.
+    one = next(mask for mask in patterns if mask.bit_count() == 2)
+    four = next(mask for mask in patterns if mask.bit_count() == 4)
+    wires = []
 
-        num = "0"
+    for wire in range(7):
+        bit = 1 << wire
+        count = sum(1 for mask in patterns if mask & bit)
 
-        output = line[1].split(" ")
-        for word in output:
-            word = word.strip()
-            idx = []
-            for letter in word:
-                idx.append(perm.index(letter))
+        if count in SEGMENT_FREQUENCIES:
+            wires.append(SEGMENT_FREQUENCIES[count])
+        elif count == 8:
+            wires.append(2 if one & bit else 0)
+        else:
+            wires.append(3 if four & bit else 6)
+
+    return wires
+
+
+def digit_table(patterns: list[int]) -> dict[int, int]:
+    # Wire mask to digit for one entry, so each output word is a single lookup
+    wires = decode_wires(patterns)
+    table = {}
+
+    for mask in patterns:
+        segments = 0
+        for wire, segment in enumerate(wires):
+            if mask >> wire & 1:
+                segments |= 1 << segment
 
-            idx.sort()
+        table[mask] = DIGITS[segments]
 
-            for k, v in MAPPING.items():
-                if v == idx:
-                    num += str(k)
+    return table
 
-        total_output += int(num)
+
+def calculate_output_vals(rawData: list[str]) -> int:
+    parsed_data = parse_records(rawData)
+    total_output = 0
+
+    for line in parsed_data:
+        table = digit_table([word_mask(word) for word in line[0].split()])
+
+        num = 0
+        for word in line[1].split():
+            num = num * 10 + table[word_mask(word)]
+
+        total_output += num
     return total_output
 
 
@@ -148,3 +177,17 @@ def test_identify_unique_segments(input_data: list[str], expected: int) -> None:
 )
 def test_calculate_output_vals(input_data: list[str], expected: int) -> None:
     assert calculate_output_vals(input_data) == expected
+
+
+def test_decode_wires() -> None:
+    patterns = [word_mask(word) for word in test_data_1[0].split(" | ")[0].split()]
+    # wires a..g drive segments c, f, g, a, b, d, e
+    assert decode_wires(patterns) == [2, 5, 6, 0, 1, 3, 4]
+
+
+def test_digit_table() -> None:
+    patterns = [word_mask(word) for word in test_data_1[0].split(" | ")[0].split()]
+    table = digit_table(patterns)
+    assert table[word_mask("cdfeb")] == 5
+    assert table[word_mask("ab")] == 1
+    assert table[word_mask("acedgfb")] == 8